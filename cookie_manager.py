@@ -1,42 +1,280 @@
 import os
+import re
+import asyncio
+import functools
+import hashlib
+import tempfile
+import time
 from venv import logger
+import aiohttp
 import requests
 import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Optional, Dict, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import user_agents
 
-def is_cookie_valid(cookie: str) -> bool:
+# 模块级会话，复用连接池与TLS会话，避免每次校验都重新握手
+# Cookie通过请求头显式传入，不会写入会话的cookie jar，多个账号之间互不干扰
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.2),
+))
+
+_TEST_URL = "https://yuanbao.tencent.com/api/getuserinfo"
+# 探测请求的超时时间（秒），同步与异步路径共用
+_PROBE_TIMEOUT = 5
+
+def _probe_headers(cookie: str) -> Dict[str, str]:
     """
-    测试cookie是否有效
+    构造cookie探测请求的请求头
 
     Args:
         cookie (str): 需要测试的cookie字符串
 
     Returns:
-        bool: cookie有效返回True,否则返回False
+        Dict[str, str]: 请求头
     """
-    test_url = "https://yuanbao.tencent.com/api/getuserinfo"
-    headers = {
+    return {
         "Cookie": cookie,
         "User-Agent": user_agents.get_random_user_agent()  # 使用user_agents库生成随机User-Agent
     }
 
+def _is_active(user_info: Optional[Dict[Any, Any]]) -> bool:
+    """
+    判断探测返回的用户信息是否表示cookie有效
+
+    Args:
+        user_info (Optional[Dict]): 探测返回的用户信息
+
+    Returns:
+        bool: status为2（正常状态）时返回True
+    """
+    return isinstance(user_info, dict) and user_info.get("status") == 2
+
+def _probe(cookie: str, session: requests.Session = _SESSION, timeout: float = _PROBE_TIMEOUT) -> Optional[Dict[Any, Any]]:
+    """
+    请求用户信息接口探测cookie
+
+    Args:
+        cookie (str): 需要测试的cookie字符串
+        session (requests.Session): 复用的HTTP会话
+        timeout (float): 超时时间（秒）
+
+    Returns:
+        Optional[Dict]: 请求成功时返回解析后的用户信息，否则返回None
+    """
     try:
-        response = requests.get(test_url, headers=headers)
+        response = session.get(_TEST_URL, headers=_probe_headers(cookie), timeout=timeout)
         if response.status_code == 200:
-            data = response.json()
-            # 检查返回的数据中是否包含用户信息的关键字段
-            if "userId" in data and "status" in data:
-                # status为2表示正常状态
-                return data.get("status") == 2
-        return False
-    except (requests.RequestException, json.JSONDecodeError) as e:
-        return False
+            return response.json()
+    except (requests.RequestException, ValueError) as e:
+        # 只记录cookie摘要，避免明文cookie写入日志
+        logger.error(f"测试cookie失败: {_cookie_digest(cookie)}, 错误: {e}")
+    return None
 
-def get_valid_cookie(save_user_info: bool = True) -> tuple[Optional[str], Optional[Dict[Any, Any]]]:
+def is_cookie_valid(cookie: str) -> bool:
     """
-    从环境变量文件获取有效的cookie并可选保存用户信息
+    测试cookie是否有效
+
+    Args:
+        cookie (str): 需要测试的cookie字符串
+
+    Returns:
+        bool: cookie有效返回True,否则返回False
+    """
+    return _is_active(_probe(cookie))
+
+_USER_JSON_PATH = os.path.join(os.path.dirname(__file__), 'user.json')
+# user.json在该时间（秒）内写入时视为仍然有效，跳过网络校验
+_USER_CACHE_TTL = 300
+# user.json中记录对应cookie摘要的字段名
+_DIGEST_KEY = "_cookieDigest"
+
+_COOKIE_PATTERN = re.compile(r'^YUANBAO_COOKIE=(.*)$', re.M)
+
+@functools.lru_cache(maxsize=4)
+def _parse_env_cookies(env_path: str, mtime: float) -> tuple[str, ...]:
+    """
+    解析.env文件中的cookie列表，结果按(路径, 修改时间)缓存
+
+    Args:
+        env_path (str): .env文件路径
+        mtime (float): 文件修改时间，文件变化后缓存自动失效
+
+    Returns:
+        tuple[str, ...]: cookie列表
+    """
+    data = Path(env_path).read_text(encoding="utf-8")
+    # 与逐行解析保持一致：去掉行尾空白（含\r）后再去掉两端引号
+    cookies = (value.rstrip().strip('"\'') for value in _COOKIE_PATTERN.findall(data))
+    return tuple(cookie for cookie in cookies if cookie)
+
+def _read_env_cookies(env_path: str) -> tuple[str, ...]:
+    """
+    读取.env文件中的cookie列表，文件未变化时直接返回缓存结果
+
+    Args:
+        env_path (str): .env文件路径
+
+    Returns:
+        tuple[str, ...]: cookie列表，文件不存在时为空
+    """
+    if not os.path.exists(env_path):
+        return ()
+    return _parse_env_cookies(env_path, os.path.getmtime(env_path))
+
+async def _probe_async(session: aiohttp.ClientSession, cookie: str) -> Optional[Dict[Any, Any]]:
+    """
+    异步请求用户信息接口探测cookie，与_probe逻辑一致
+
+    Args:
+        session (aiohttp.ClientSession): 复用的异步HTTP会话
+        cookie (str): 需要测试的cookie字符串
+
+    Returns:
+        Optional[Dict]: 请求成功时返回解析后的用户信息，否则返回None
+    """
+    try:
+        async with session.get(_TEST_URL, headers=_probe_headers(cookie)) as response:
+            if response.status == 200:
+                return await response.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        # 只记录cookie摘要，避免明文cookie写入日志
+        logger.error(f"测试cookie失败: {_cookie_digest(cookie)}, 错误: {e}")
+    return None
+
+async def _validate_cookies_async(cookies: tuple[str, ...]) -> tuple[Optional[str], Optional[Dict[Any, Any]]]:
+    """
+    并发测试cookie列表，按.env中的顺序返回第一个有效的cookie
+
+    Args:
+        cookies (tuple[str, ...]): 待测试的cookie列表
+
+    Returns:
+        tuple[Optional[str], Optional[Dict]]: 返回(cookie, user_info)，全部无效则返回(None, None)
+    """
+    connector = aiohttp.TCPConnector(limit=32)
+    timeout = aiohttp.ClientTimeout(total=_PROBE_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = [asyncio.create_task(_probe_async(session, cookie)) for cookie in cookies]
+        try:
+            # 所有请求并发进行，但按.env顺序取结果：排在前面的有效cookie优先，
+            # 第i个有效且前面的都已返回时即可结束，无需等待更慢的请求
+            for cookie, task in zip(cookies, tasks):
+                user_info = await task
+                if _is_active(user_info):
+                    return cookie, user_info
+        finally:
+            # 取消其余仍在进行的请求，并在关闭会话前等待其结束
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    return None, None
+
+def _cookie_digest(cookie: str) -> str:
+    """
+    计算cookie摘要，用于在user.json中标记对应的cookie而不保存明文
+
+    Args:
+        cookie (str): cookie字符串
+
+    Returns:
+        str: 十六进制摘要
+    """
+    return hashlib.blake2b(cookie.encode("utf-8"), digest_size=16).hexdigest()
+
+def _dumps(data: Dict[Any, Any]) -> bytes:
+    """
+    将用户信息序列化为缩进格式的UTF-8 JSON
+
+    Args:
+        data (Dict): 用户信息
+
+    Returns:
+        bytes: JSON字节串
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+def _save_user_info(cookie: str, user_info: Dict[Any, Any]) -> None:
+    """
+    保存用户信息到user.json，并记录对应cookie的摘要
+
+    Args:
+        cookie (str): 通过校验的cookie
+        user_info (Dict): 用户信息
+    """
+    data = _dumps({**user_info, _DIGEST_KEY: _cookie_digest(cookie)})
+
+    try:
+        with open(_USER_JSON_PATH, 'rb') as f:
+            unchanged = f.read() == data
+    except OSError:
+        unchanged = False
+    if unchanged:
+        # 内容未变，只刷新修改时间，使缓存继续有效
+        os.utime(_USER_JSON_PATH)
+        return
+
+    # 先写临时文件再原子替换，避免中途崩溃留下损坏的user.json
+    # 临时文件名唯一，多个进程同时保存时互不覆盖
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(_USER_JSON_PATH), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, _USER_JSON_PATH)
+    except OSError as e:
+        logger.error(f"保存用户信息失败: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+def _load_cached_user(cookies: tuple[str, ...], env_path: str) -> tuple[Optional[str], Optional[Dict[Any, Any]]]:
+    """
+    从近期保存的user.json中取出已校验的cookie和用户信息
+
+    仅当user.json在_USER_CACHE_TTL秒内写入、晚于.env的修改时间，
+    且记录的cookie摘要仍能在.env中找到时才命中缓存。
+
+    Args:
+        cookies (tuple[str, ...]): .env中的cookie列表
+        env_path (str): .env文件路径
+
+    Returns:
+        tuple[Optional[str], Optional[Dict]]: 命中时返回(cookie, user_info)，否则返回(None, None)
+    """
+    try:
+        mtime = os.path.getmtime(_USER_JSON_PATH)
+        if mtime < time.time() - _USER_CACHE_TTL or mtime < os.path.getmtime(env_path):
+            return None, None
+        with open(_USER_JSON_PATH, 'r', encoding='utf-8') as f:
+            user_info = json.load(f)
+    except (OSError, ValueError):
+        return None, None
+
+    if not isinstance(user_info, dict):
+        return None, None
+    digest = user_info.pop(_DIGEST_KEY, None)
+    for cookie in cookies:
+        if _cookie_digest(cookie) == digest:
+            return cookie, user_info
+    return None, None
+
+async def get_valid_cookie_async(save_user_info: bool = True) -> tuple[Optional[str], Optional[Dict[Any, Any]]]:
+    """
+    从环境变量文件获取有效的cookie并可选保存用户信息（异步版本，供事件循环中调用）
 
     Args:
         save_user_info (bool): 是否保存用户信息到user.json
@@ -46,38 +284,45 @@ def get_valid_cookie(save_user_info: bool = True) -> tuple[Optional[str], Option
     """
     # 从环境变量文件读取cookie列表
     env_path = os.path.join(os.path.dirname(__file__), '.env')
-    cookies = []
     
     try:
-        if os.path.exists(env_path):
-            with open(env_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.startswith('YUANBAO_COOKIE='):
-                        cookie = line.strip().split('=', 1)[1].strip('"\'')
-                        cookies.append(cookie)
+        cookies = _read_env_cookies(env_path)
     except Exception as e:
         print(f"读取环境变量文件失败: {e}")
         return None, None
 
-    # 测试每个cookie直到找到有效的
-    for cookie in cookies:
-        test_url = "https://yuanbao.tencent.com/api/getuserinfo"
-        headers = {
-            "Cookie": cookie,
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
-        }
-        try:
-            response = requests.get(test_url, headers=headers)
-            if response.status_code == 200:
-                user_info = response.json()
-                if user_info.get("status") == 2:
-                    if save_user_info:
-                        # 保存用户信息到user.json
-                        with open(os.path.join(os.path.dirname(__file__), 'user.json'), 'w', encoding='utf-8') as f:
-                            json.dump(user_info, f, ensure_ascii=False, indent=4)
-                    return cookie, user_info
-        except Exception as e:
-            logger.error(f"测试cookie失败: {cookie}, 错误: {e}")
-            continue
-    
-    return None, None
+    if not cookies:
+        return None, None
+
+    # user.json是最近校验过的结果时直接复用，省去网络请求
+    cookie, user_info = _load_cached_user(cookies, env_path)
+    if cookie is not None:
+        return cookie, user_info
+
+    # 并发测试所有cookie
+    cookie, user_info = await _validate_cookies_async(cookies)
+    if cookie is None:
+        return None, None
+
+    if save_user_info:
+        _save_user_info(cookie, user_info)
+    return cookie, user_info
+
+def get_valid_cookie(save_user_info: bool = True) -> tuple[Optional[str], Optional[Dict[Any, Any]]]:
+    """
+    从环境变量文件获取有效的cookie并可选保存用户信息
+
+    Args:
+        save_user_info (bool): 是否保存用户信息到user.json
+
+    Returns:
+        tuple[Optional[str], Optional[Dict]]: 返回(cookie, user_info)，如果无效则返回(None, None)
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(get_valid_cookie_async(save_user_info))
+
+    # 已处于事件循环中（如FastAPI），asyncio.run不可用，改在独立线程中运行
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, get_valid_cookie_async(save_user_info)).result()
@@ -1,9 +1,59 @@
+import asyncio
+import aiohttp
 import requests
 import json
-from typing import Tuple, List
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
 
 import user_agents
 
+# 模块级会话，多次对话复用keep-alive连接与TLS会话
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=64))
+
+# SSE解析按字节比较，省去逐行decode
+_DATA_PREFIX = b"data: "
+_SKIP_BYTES = frozenset((b"status", b"reasoner", b"text"))
+# 安装了orjson时使用其C实现解析，二者都直接接受bytes
+_loads = orjson.loads if orjson is not None else json.loads
+
+# 对话请求中每次调用都不变的部分，只在模块加载时构建一次
+_HEADERS_BASE = {"Content-Type": "application/json"}
+
+_MODEL_MAP = MappingProxyType({
+    "deep_seek_v3": "deep_seek_v3",
+    "deep_seek_r1": "deep_seek",
+    "hunyuan": "hunyuan_gpt_175B_0404",
+    "hunyuan_t1": "hunyuan_t1"
+})
+
+# 嵌套的options不放进模板共享，每次调用按此重新构建，避免请求之间相互影响
+_IMAGE_INTENTION = MappingProxyType({
+    "needIntentionModel": True,
+    "backendUpdateFlag": 2,
+    "intentionStatus": True,
+})
+
+# 模板中的值均为不可变对象，可安全地解包到每次的请求体中
+_PAYLOAD_TEMPLATE = MappingProxyType({
+    "model": "gpt_175B_0404",
+    "plugin": "Adaptive",
+    "displayPromptType": 1,
+    "multimedia": (),
+    "agentId": "naQivTmsDa",
+    "supportHint": 1,
+    "version": "v2",
+})
+
+# 异步会话需在事件循环内创建，首次使用时由_get_async_session初始化
+_ASYNC_SESSION: Optional[aiohttp.ClientSession] = None
+_ASYNC_SESSION_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
 
 def merge_thoughts(thoughts: List[str]) -> str:
     """
@@ -16,25 +66,102 @@ def merge_thoughts(thoughts: List[str]) -> str:
         str: 合并后的完整思考文本
     """
     merged_thoughts = []
-    current_thought = ""
+    current_buf: List[str] = []  # 累积的短片段，最后统一join，避免字符串反复拼接
 
     for thought in thoughts:
         if thought:
-            if len(thought.strip()) <= 2:  # 如果是短片段
-                current_thought += thought
+            stripped = thought.strip()
+            if len(stripped) <= 2:  # 如果是短片段
+                current_buf.append(thought)
             else:
-                if current_thought:  # 如果有累积的短片段
-                    merged_thoughts.append(current_thought)
-                    current_thought = ""
-                merged_thoughts.append(thought)
+                if current_buf:  # 如果有累积的短片段
+                    merged_thoughts.append("".join(current_buf).strip())
+                    current_buf.clear()
+                merged_thoughts.append(stripped)
 
-    if current_thought:  # 添加最后剩余的短片段
-        merged_thoughts.append(current_thought)
+    if current_buf:  # 添加最后剩余的短片段
+        merged_thoughts.append("".join(current_buf).strip())
 
-    merged = " ".join(thought.strip() for thought in merged_thoughts if thought.strip())
+    merged = " ".join(thought for thought in merged_thoughts if thought)
     return merged if merged else "null"
 
 
+def _build_request(
+    cookie: str,
+    message: str,
+    model: str,
+    internet: bool
+) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """
+    构造对话请求的请求头和请求体
+
+    Args:
+        cookie (str): 用户认证Cookie
+        message (str): 要发送的消息内容
+        model (str): 模型类型
+        internet (bool): 是否使用互联网搜索功能
+
+    Returns:
+        Tuple[Dict, Dict]: (headers, payload)
+    """
+    headers = {
+        **_HEADERS_BASE,
+        "Cookie": cookie,
+        "User-Agent": user_agents.get_random_user_agent()  # 使用随机User-Agent
+    }
+
+    payload = {
+        **_PAYLOAD_TEMPLATE,
+        "prompt": message,
+        "displayPrompt": message,
+        "options": {"imageIntention": dict(_IMAGE_INTENTION)},
+        "chatModelId": _MODEL_MAP.get(model, "deep_seek_v3"),  # 默认使用v3模型
+        "supportFunctions": ("supportInternetSearch",) if internet else (),  # 是否支持互联网搜索功能
+    }
+    return headers, payload
+
+
+def _parse_line(line: bytes) -> Optional[Dict[str, Any]]:
+    """
+    解析一行SSE数据
+
+    Args:
+        line (bytes): 原始行数据
+
+    Returns:
+        Optional[Dict]: 解析出的数据帧，非数据行或无法解析时返回None
+    """
+    line = line.strip()
+    if not line.startswith(_DATA_PREFIX):
+        return None
+    payload = line[6:]
+
+    if payload in _SKIP_BYTES or (payload[:1] == b"[" and payload[-1:] == b"]"):
+        return None
+
+    try:
+        return _loads(payload)
+    except ValueError:  # 同时覆盖json.JSONDecodeError与orjson.JSONDecodeError
+        return None
+
+
+def _collect(data: Dict[str, Any], thinking_process: List[str], final_output: List[str]) -> None:
+    """
+    将数据帧归类到思考过程或输出内容
+
+    Args:
+        data (Dict): 解析后的数据帧
+        thinking_process (List[str]): 思考片段列表
+        final_output (List[str]): 输出片段列表
+    """
+    if data.get("type") == "think":
+        thinking_process.append(data.get("content", ""))
+    elif data.get("type") == "text" and data.get("msg"):
+        final_output.append(data["msg"])
+    elif data.get("content"):
+        final_output.append(data["content"])
+
+
 def chat_with_yuanbao(
     cookie: str, # 用户认证Cookie
     uuid: str, # 会话UUID
@@ -58,73 +185,19 @@ def chat_with_yuanbao(
             - 第二个字符串是合并后的完整输出内容
     """
     url = f"https://yuanbao.tencent.com/api/chat/{uuid}"
-
-    headers = {
-        "Content-Type": "application/json", 
-        "Cookie": cookie,
-        "User-Agent": user_agents.get_random_user_agent()  # 使用随机User-Agent
-        }
-
-    # 根据model参数设置默认为v3
-    model_mapping = {
-        "deep_seek_v3": "deep_seek_v3",
-        "deep_seek_r1": "deep_seek",
-        "hunyuan": "hunyuan_gpt_175B_0404",
-        "hunyuan_t1": "hunyuan_t1"
-    }
-    chat_model_id = model_mapping.get(model, "deep_seek_v3")  # 默认使用v3模型
-    # 检查是否使用互联网搜索功能
-    support_functions = ["supportInternetSearch"] if internet else []
-
-    payload = {
-        "model": "gpt_175B_0404",
-        "prompt": message,
-        "plugin": "Adaptive",
-        "displayPrompt": message,
-        "displayPromptType": 1,
-        "options": {
-            "imageIntention": {
-                "needIntentionModel": True,
-                "backendUpdateFlag": 2,
-                "intentionStatus": True,
-            }
-        },
-        "multimedia": [],
-        "agentId": "naQivTmsDa",
-        "supportHint": 1,
-        "version": "v2",
-        "chatModelId": chat_model_id,  # 设置聊天模型ID
-        "supportFunctions": support_functions,  # 是否支持互联网搜索功能
-    }
+    headers, payload = _build_request(cookie, message, model, internet)
 
     try:
-        with requests.post(url, json=payload, headers=headers, stream=True) as response:
+        with _SESSION.post(url, json=payload, headers=headers, stream=True, timeout=(5, 60)) as response:
             response.raise_for_status()
             thinking_process = []
             final_output = []
 
-            for line in response.iter_lines():
-                if line:
-                    line_str = line.decode("utf-8").strip()
-
-                    if line_str.startswith("data: "):
-                        json_str = line_str[6:]
-
-                        if json_str in ["status", "reasoner", "text"] or (
-                            json_str.startswith("[") and json_str.endswith("]")
-                        ):
-                            continue
-
-                        try:
-                            data = json.loads(json_str)
-                            if data.get("type") == "think":
-                                thinking_process.append(data.get("content", ""))
-                            elif data.get("type") == "text" and data.get("msg"):
-                                final_output.append(data["msg"])
-                            elif data.get("content"):
-                                final_output.append(data["content"])
-                        except json.JSONDecodeError:
-                            continue
+            # 较大的chunk_size减少长回复时的read系统调用次数
+            for line in response.iter_lines(chunk_size=65536):
+                data = _parse_line(line)
+                if data is not None:
+                    _collect(data, thinking_process, final_output)
 
             # 合并思考过程和输出内容
             merged_thinking = merge_thoughts(thinking_process)
@@ -137,6 +210,97 @@ def chat_with_yuanbao(
         return "", ""
 
 
+def _get_async_session() -> aiohttp.ClientSession:
+    """
+    获取当前事件循环对应的模块级aiohttp会话
+
+    aiohttp会话绑定创建它的事件循环，事件循环变化（如多次asyncio.run）时重新创建。
+
+    Returns:
+        aiohttp.ClientSession: 复用连接池的异步HTTP会话
+    """
+    global _ASYNC_SESSION, _ASYNC_SESSION_LOOP
+    loop = asyncio.get_running_loop()
+    if _ASYNC_SESSION is None or _ASYNC_SESSION.closed or _ASYNC_SESSION_LOOP is not loop:
+        _ASYNC_SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(sock_connect=5, sock_read=60),
+            read_bufsize=1 << 20,
+        )
+        _ASYNC_SESSION_LOOP = loop
+    return _ASYNC_SESSION
+
+
+async def close_async_session() -> None:
+    """
+    关闭模块级的aiohttp会话，应在事件循环结束前（如FastAPI的shutdown事件中）调用
+    """
+    global _ASYNC_SESSION, _ASYNC_SESSION_LOOP
+    if _ASYNC_SESSION is not None and _ASYNC_SESSION_LOOP is asyncio.get_running_loop():
+        await _ASYNC_SESSION.close()
+    _ASYNC_SESSION = None
+    _ASYNC_SESSION_LOOP = None
+
+
+async def chat_with_yuanbao_async(
+    cookie: str, # 用户认证Cookie
+    uuid: str, # 会话UUID
+    message: str, # 要发送的消息内容
+    model: str = "v3", # 模型类型，"v3"或"r1"，默认为"v3"
+    internet: bool = False, # 是否使用互联网搜索功能
+    queue: Optional[asyncio.Queue] = None # 接收流式数据帧的队列
+) -> Tuple[str, str]:
+    """
+    与腾讯元宝API交互的异步封装函数
+
+    若传入queue，每解析出一个数据帧就以 {type, content, msg} 字典形式放入队列，
+    结束时放入None，调用方（如FastAPI的流式响应）可据此边收边转发。
+    事件循环结束前应调用close_async_session关闭复用的会话。
+
+    Args:
+        cookie (str): 用户认证Cookie
+        uuid (str): 会话UUID
+        message (str): 要发送的消息内容
+        model (str): 模型类型，"v3"或"r1"，默认为"v3"
+        internet (bool): 是否使用互联网搜索功能
+        queue (Optional[asyncio.Queue]): 接收流式数据帧的队列
+
+    Returns:
+        Tuple[str, str]:
+            - 第一个字符串是合并后的完整思考过程
+            - 第二个字符串是合并后的完整输出内容
+    """
+    url = f"https://yuanbao.tencent.com/api/chat/{uuid}"
+    headers, payload = _build_request(cookie, message, model, internet)
+    thinking_process = []
+    final_output = []
+
+    try:
+        async with _get_async_session().post(url, json=payload, headers=headers) as response:
+            response.raise_for_status()
+            # StreamReader按行迭代（readuntil换行符），结尾换行符由_parse_line去除
+            async for line in response.content:
+                data = _parse_line(line)
+                if data is None:
+                    continue
+                _collect(data, thinking_process, final_output)
+                if queue is not None:
+                    await queue.put({
+                        "type": data.get("type"),
+                        "content": data.get("content"),
+                        "msg": data.get("msg"),
+                    })
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"请求发生错误: {e}")
+        return "", ""
+    finally:
+        if queue is not None:
+            await queue.put(None)
+
+    return merge_thoughts(thinking_process), "".join(final_output)
+
+
 def print_chat_result(thinking: str, output: str) -> None:
     """
     打印聊天结果